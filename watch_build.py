@@ -10,40 +10,65 @@ Keyboard shortcuts:
   Q - Quit
 """
 
+import itertools
 import json
 import os
+import queue
 import subprocess
 import sys
+import threading
 import time
-import select
 import termios
 import tty
-import urllib.error
-import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Prefer orjson for parsing the (large) asset manifest when available
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
 
 # Try to import watchdog, install if missing
 try:
     from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent
+    from watchdog.events import (
+        FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent,
+        DirCreatedEvent, DirDeletedEvent, DirMovedEvent,
+    )
 except ImportError:
     print("Installing watchdog...")
     subprocess.check_call([sys.executable, "-m", "pip", "install", "watchdog"])
     from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent
+    from watchdog.events import (
+        FileSystemEventHandler, FileModifiedEvent, FileCreatedEvent,
+        DirCreatedEvent, DirDeletedEvent, DirMovedEvent,
+    )
 
 # Configuration
 GAME_NAME = "Arc Spirits"
 PROJECT_DIR = Path(__file__).resolve().parent
 TTSMODMANAGER_DIR = PROJECT_DIR / "TTSModManager"
+TTSMODMANAGER_BIN = TTSMODMANAGER_DIR / (
+    ".tts_modmanager_bin.exe" if sys.platform == "win32" else ".tts_modmanager_bin"
+)
 ASSET_MANIFEST_URL = "https://gvxfokbptelmvvlxbigh.supabase.co/functions/v1/export-all-tts-json"
 ASSET_CHECK_TIMEOUT = 10
+ASSET_CHECK_WORKERS = 32
+
+# Shared HTTP session so manifest fetches and asset checks reuse
+# keep-alive connections to Supabase instead of reconnecting per request
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=ASSET_CHECK_WORKERS))
 
-# Cache asset checks by export timestamp
-ASSET_CHECK_CACHE = {
-    "exported_at": None,
-    "bad_urls": None,
-}
+# Per-URL asset check results, persisted between runs
+ASSET_CACHE_FILE = PROJECT_DIR / ".asset_cache.json"
+ASSET_CACHE_TTL_SECONDS = 24 * 60 * 60
 
 # Directories/files to watch
 WATCH_PATTERNS = [
@@ -56,9 +81,22 @@ WATCH_PATTERNS = [
 # File extensions to trigger builds
 WATCH_EXTENSIONS = {".ttslua", ".lua", ".json", ".xml"}
 
+# Precomputed string forms of the above, so irrelevant events can be
+# rejected without building Path objects
+WATCH_SUFFIXES = tuple(WATCH_EXTENSIONS)
+WATCH_DIRS = tuple(p for p in WATCH_PATTERNS if not Path(p).suffix)
+WATCH_ROOTS = frozenset(str(PROJECT_DIR / p) for p in WATCH_DIRS)
+WATCH_DIR_PREFIXES = tuple(root + os.sep for root in WATCH_ROOTS)
+WATCH_FILES = frozenset(str(PROJECT_DIR / p) for p in WATCH_PATTERNS if Path(p).suffix)
+
 # Debounce settings (prevent multiple rapid builds)
 DEBOUNCE_SECONDS = 1.0
 
+# Builds, decomposes and binary compiles run one at a time: watcher builds
+# fire on timer threads while manual ones run on the main thread, and
+# they all write the same save file and binary
+BUILD_LOCK = threading.RLock()
+
 
 def get_tts_saves_folder():
     """Get the TTS Saves folder path based on OS."""
@@ -72,49 +110,91 @@ def get_tts_saves_folder():
 
 def fetch_asset_manifest():
     """Fetch the latest asset manifest from Supabase."""
-    with urllib.request.urlopen(ASSET_MANIFEST_URL, timeout=ASSET_CHECK_TIMEOUT) as response:
-        return json.loads(response.read().decode("utf-8"))
+    response = SESSION.get(ASSET_MANIFEST_URL, timeout=ASSET_CHECK_TIMEOUT)
+    response.raise_for_status()
+    return json_loads(response.content)
 
 
-def gather_asset_urls(data):
-    """Recursively gather all Supabase asset URLs from the manifest."""
-    urls = set()
-
-    def walk(value):
+def iter_asset_urls(data):
+    """Yield every Supabase asset URL in the manifest (may repeat)."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
         if isinstance(value, dict):
-            for key, inner in value.items():
-                if key == "schema_docs":
-                    continue
-                walk(inner)
+            stack.extend(inner for key, inner in value.items() if key != "schema_docs")
         elif isinstance(value, list):
-            for inner in value:
-                walk(inner)
-        elif isinstance(value, str):
-            if value.startswith("http") and "supabase.co" in value:
-                urls.add(value)
-
-    walk(data)
-    return urls
+            stack.extend(value)
+        elif isinstance(value, str) and value.startswith("http") and "supabase.co" in value:
+            yield value
+
+
+def interleave_by_host(urls):
+    """Order URLs round-robin across hosts so no single origin gets every worker."""
+    by_host = defaultdict(list)
+    for url in urls:
+        by_host[urlparse(url).netloc].append(url)
+    return [
+        url
+        for url in itertools.chain.from_iterable(itertools.zip_longest(*by_host.values()))
+        if url is not None
+    ]
 
 
 def check_url(url):
     """Return True if the asset URL is reachable."""
-    request = urllib.request.Request(url, method="HEAD")
+    # A one-byte ranged GET works on hosts that reject HEAD. 416 means the
+    # file exists but is empty.
     try:
-        with urllib.request.urlopen(request, timeout=ASSET_CHECK_TIMEOUT) as response:
-            return response.status < 400
-    except urllib.error.HTTPError as err:
-        if err.code != 405:
-            return False
+        with SESSION.get(
+            url,
+            headers={"Range": "bytes=0-0"},
+            timeout=ASSET_CHECK_TIMEOUT,
+            stream=True,
+            allow_redirects=True,
+        ) as response:
+            # Read the (at most one byte) body so the connection goes back
+            # to the pool; closing it unread drops the socket. A 200 means
+            # the server ignored Range and is sending the whole file, so
+            # that connection is dropped instead.
+            if response.status_code != 200:
+                for _ in response.iter_content():
+                    pass
+            return response.status_code < 400 or response.status_code == 416
     except Exception:
         return False
 
-    request = urllib.request.Request(url, method="GET")
+
+def _load_cache():
+    """Load cached asset check results as {url: (checked_at, ok)}.
+
+    Malformed entries are dropped so they are simply re-checked.
+    """
     try:
-        with urllib.request.urlopen(request, timeout=ASSET_CHECK_TIMEOUT) as response:
-            return response.status < 400
-    except Exception:
-        return False
+        with open(ASSET_CACHE_FILE, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    cache = {}
+    for url, entry in data.items():
+        if not isinstance(entry, list) or len(entry) != 2:
+            continue
+        checked_at, ok = entry
+        if isinstance(checked_at, (int, float)) and not isinstance(checked_at, bool) \
+                and isinstance(ok, bool):
+            cache[url] = (checked_at, ok)
+    return cache
+
+
+def _save_cache(cache):
+    """Persist asset check results; a failed write only costs a re-check."""
+    try:
+        with open(ASSET_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError as err:
+        print(f"Could not save asset cache: {err}")
 
 
 def verify_assets():
@@ -125,33 +205,33 @@ def verify_assets():
         print(f"Asset check failed: {err}")
         return False
 
-    exported_at = manifest.get("exported_at")
-    cached_export = ASSET_CHECK_CACHE["exported_at"]
-    cached_bad = ASSET_CHECK_CACHE["bad_urls"]
-    if cached_export == exported_at and cached_bad is not None:
-        if cached_bad:
-            print(f"Asset check failed (cached): {len(cached_bad)} missing assets")
-            for url in cached_bad[:10]:
-                print(f"  - {url}")
-            if len(cached_bad) > 10:
-                print(f"  ... and {len(cached_bad) - 10} more")
-            return False
-        return True
-
-    urls = sorted(gather_asset_urls(manifest))
+    urls = sorted(set(iter_asset_urls(manifest)))
     if not urls:
         print("Asset check failed: no URLs found in manifest")
         return False
 
-    bad_urls = []
-    for index, url in enumerate(urls, start=1):
-        if not check_url(url):
-            bad_urls.append(url)
-        if index % 100 == 0:
-            print(f"Checked {index}/{len(urls)} assets...")
+    # Only probe URLs that are new, stale, or failed last time
+    cache = _load_cache()
+    now = time.time()
+    to_check = [
+        url for url in urls
+        if not cache.get(url, (0, False))[1]
+        or cache[url][0] < now - ASSET_CACHE_TTL_SECONDS
+    ]
+
+    if to_check:
+        with ThreadPoolExecutor(max_workers=ASSET_CHECK_WORKERS) as executor:
+            futures = {
+                executor.submit(check_url, url): url
+                for url in interleave_by_host(to_check)
+            }
+            for index, future in enumerate(as_completed(futures), start=1):
+                cache[futures[future]] = (now, future.result())
+                if index % 100 == 0:
+                    print(f"Checked {index}/{len(to_check)} assets...")
+        _save_cache({url: cache[url] for url in urls})
 
-    ASSET_CHECK_CACHE["exported_at"] = exported_at
-    ASSET_CHECK_CACHE["bad_urls"] = bad_urls
+    bad_urls = [url for url in urls if not cache[url][1]]
 
     if bad_urls:
         print(f"Asset check failed: {len(bad_urls)} missing assets")
@@ -161,20 +241,64 @@ def verify_assets():
             print(f"  ... and {len(bad_urls) - 10} more")
         return False
 
-    print(f"Asset check OK ({len(urls)} assets)")
+    print(f"Asset check OK ({len(urls)} assets, {len(urls) - len(to_check)} cached)")
+    return True
+
+
+def ensure_modmanager_binary():
+    """Compile TTSModManager if the cached binary is missing or older than its sources."""
+    if TTSMODMANAGER_BIN.exists():
+        bin_mtime = TTSMODMANAGER_BIN.stat().st_mtime
+        sources = [
+            path for path in TTSMODMANAGER_DIR.rglob("*.go")
+            if not path.name.endswith("_test.go")
+        ]
+        sources += [TTSMODMANAGER_DIR / "go.mod", TTSMODMANAGER_DIR / "go.sum"]
+        if all(not path.exists() or path.stat().st_mtime <= bin_mtime for path in sources):
+            return True
+
+    print("Compiling TTSModManager...")
+    try:
+        result = subprocess.run(
+            ["go", "build", "-o", str(TTSMODMANAGER_BIN), "."],
+            cwd=TTSMODMANAGER_DIR,
+            capture_output=True,
+            text=True,
+            timeout=300
+        )
+    except subprocess.TimeoutExpired:
+        print("TTSModManager compile timed out!")
+        return False
+    except Exception as e:
+        print(f"TTSModManager compile error: {e}")
+        return False
+
+    if result.returncode != 0:
+        print("TTSModManager compile FAILED:")
+        print(result.stderr)
+        return False
     return True
 
 
 def run_build(check_assets: bool = False):
     """Run TTSModManager to build the mod."""
+    with BUILD_LOCK:
+        _run_build(check_assets)
+
+
+def _run_build(check_assets: bool):
     if check_assets and not verify_assets():
         print("Build skipped due to missing assets.")
         return
 
+    if not ensure_modmanager_binary():
+        print("Build skipped.")
+        return
+
     output_file = get_tts_saves_folder() / f"{GAME_NAME}.json"
 
     cmd = [
-        "go", "run", "main.go",
+        str(TTSMODMANAGER_BIN),
         f"-moddir={PROJECT_DIR}",
         f"-modfile={output_file}",
     ]
@@ -209,14 +333,23 @@ def run_build(check_assets: bool = False):
 
 def run_decompose():
     """Run TTSModManager to decompose (extract TTS save to source files)."""
+    with BUILD_LOCK:
+        _run_decompose()
+
+
+def _run_decompose():
     output_file = get_tts_saves_folder() / f"{GAME_NAME}.json"
 
     if not output_file.exists():
         print(f"Error: TTS save file not found: {output_file}")
         return
 
+    if not ensure_modmanager_binary():
+        print("Decompose skipped.")
+        return
+
     cmd = [
-        "go", "run", "main.go",
+        str(TTSMODMANAGER_BIN),
         f"-moddir={PROJECT_DIR}",
         f"-modfile={output_file}",
         "-reverse",
@@ -282,23 +415,68 @@ def trigger_tts_reload():
 class BuildHandler(FileSystemEventHandler):
     """Handles file system events and triggers builds."""
 
-    def __init__(self):
-        self.last_build_time = 0
-
-    def should_trigger_build(self, path: Path) -> bool:
-        """Check if this file change should trigger a build."""
-        # Check extension
-        if path.suffix.lower() not in WATCH_EXTENSIONS:
-            return False
+    def __init__(self, observer):
+        self._observer = observer
+        self._root_watches = {}
+        self._lock = threading.Lock()
+        self._timer = None
+        self._generation = 0
+        self._pending = set()
+
+    def schedule_watches(self):
+        """Watch the source roots, deferring any that don't exist yet."""
+        # Watch only the source roots, so events from .git/, TTSModManager/
+        # etc. never reach Python. The non-recursive watch on the project
+        # directory covers top-level files (config.json) and reports roots
+        # being deleted and recreated (e.g. objects/ by decompose).
+        for watch_dir in WATCH_DIRS:
+            watch_path = PROJECT_DIR / watch_dir
+            if watch_path.is_dir():
+                self._watch_root(str(watch_path))
+            else:
+                print(f"{watch_dir}/ not found yet, will watch it once created")
+        self._observer.schedule(self, str(PROJECT_DIR), recursive=False)
+
+    def _watch_root(self, src: str):
+        """(Re)start the recursive watch on a source root."""
+        # A root that was deleted and recreated still has its old watch
+        # registered, but that emitter stopped when its directory went away
+        self._unwatch_root(src)
+        self._root_watches[src] = self._observer.schedule(self, src, recursive=True)
+
+    def _unwatch_root(self, src: str):
+        """Drop the watch on a source root, if any."""
+        watch = self._root_watches.pop(src, None)
+        if watch is not None:
+            try:
+                self._observer.unschedule(watch)
+            except KeyError:
+                pass
+
+    def _on_root_created(self, src: str):
+        """Watch a source root that appeared after startup or was recreated."""
+        try:
+            self._watch_root(src)
+        except OSError as err:
+            print(f"\nCould not watch {Path(src).relative_to(PROJECT_DIR)}/: {err}")
+            return
+        print(f"\nNow watching {Path(src).relative_to(PROJECT_DIR)}/")
 
-        # Check if in watched directories
-        rel_path = path.relative_to(PROJECT_DIR)
-        first_part = rel_path.parts[0] if rel_path.parts else ""
+    def _on_root_deleted(self, src: str):
+        """Drop the watch on a source root that no longer exists."""
+        # Events from the root's own watch and the project watch can arrive
+        # out of order, so a delete seen after the root was already
+        # recreated is stale and must not drop the new watch
+        if not os.path.isdir(src):
+            self._unwatch_root(src)
 
-        if first_part not in WATCH_PATTERNS and str(rel_path) not in WATCH_PATTERNS:
-            return False
+    def should_trigger_build(self, path: Path) -> bool:
+        """Check if this file change should trigger a build.
 
+        Extension and location are already checked in on_any_event.
+        """
         # Ignore hidden files and temp files
+        rel_path = path.relative_to(PROJECT_DIR)
         if any(part.startswith('.') for part in rel_path.parts):
             return False
         if path.name.endswith('~') or path.name.startswith('.#'):
@@ -309,33 +487,86 @@ class BuildHandler(FileSystemEventHandler):
     def on_any_event(self, event):
         """Handle file system events."""
         if event.is_directory:
+            if isinstance(event, DirCreatedEvent) and event.src_path in WATCH_ROOTS:
+                self._on_root_created(event.src_path)
+            elif isinstance(event, DirDeletedEvent) and event.src_path in WATCH_ROOTS:
+                self._on_root_deleted(event.src_path)
+            elif isinstance(event, DirMovedEvent):
+                if event.src_path in WATCH_ROOTS:
+                    self._on_root_deleted(event.src_path)
+                if event.dest_path in WATCH_ROOTS:
+                    self._on_root_created(event.dest_path)
             return
 
         if not isinstance(event, (FileModifiedEvent, FileCreatedEvent)):
             return
 
-        path = Path(event.src_path)
-
-        if not self.should_trigger_build(path):
+        src = event.src_path
+        if not src.lower().endswith(WATCH_SUFFIXES):
             return
-
-        # Debounce
-        now = time.time()
-        if now - self.last_build_time < DEBOUNCE_SECONDS:
+        if not src.startswith(WATCH_DIR_PREFIXES) and src not in WATCH_FILES:
             return
 
-        self.last_build_time = now
-
-        rel_path = path.relative_to(PROJECT_DIR)
-        print(f"\nChanged: {rel_path}")
-        run_build()
+        path = Path(src)
 
+        if not self.should_trigger_build(path):
+            return
 
-def get_key_nonblocking():
-    """Get a keypress without blocking. Returns None if no key pressed."""
-    if select.select([sys.stdin], [], [], 0)[0]:
-        return sys.stdin.read(1)
-    return None
+        # Debounce: restart the timer on every change and build once the
+        # burst of events has settled
+        with self._lock:
+            self._pending.add(path.relative_to(PROJECT_DIR))
+            if self._timer:
+                self._timer.cancel()
+            self._generation += 1
+            self._timer = threading.Timer(
+                DEBOUNCE_SECONDS, self._build_pending, args=(self._generation,)
+            )
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel_pending(self):
+        """Drop any build that is still waiting for the debounce window."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            self._generation += 1
+            self._pending.clear()
+
+    def _build_pending(self, generation: int):
+        """Build once for all changes collected during the debounce window."""
+        with self._lock:
+            # A newer event restarted the debounce after this timer had
+            # already fired; that timer will pick up the changes
+            if generation != self._generation:
+                return
+            self._timer = None
+
+        # Wait for any running build. If more changes arrived meanwhile,
+        # leave them to the newest timer so only one build runs for them.
+        with BUILD_LOCK:
+            with self._lock:
+                if generation != self._generation:
+                    return
+                changed = sorted(self._pending)
+                self._pending.clear()
+            if not changed:
+                return
+
+            print()
+            for rel_path in changed:
+                print(f"Changed: {rel_path}")
+            run_build()
+
+
+def read_keys(keys: queue.Queue):
+    """Read single keypresses from stdin into a queue. Runs on a daemon thread."""
+    while True:
+        key = sys.stdin.read(1)
+        keys.put(key)
+        if not key:  # EOF
+            return
 
 
 def main():
@@ -361,43 +592,43 @@ def main():
         print("Creating it...")
         saves_folder.mkdir(parents=True, exist_ok=True)
 
+    # Compile TTSModManager up front so the first build doesn't pay for it
+    ensure_modmanager_binary()
+
     # Set up file watcher
-    event_handler = BuildHandler()
     observer = Observer()
-
-    # Watch the project directory
-    observer.schedule(event_handler, str(PROJECT_DIR), recursive=True)
+    event_handler = BuildHandler(observer)
+    event_handler.schedule_watches()
     observer.start()
 
     print(f"Watching {PROJECT_DIR}...")
     print("Make a change to trigger a build, or press B/D/Q\n")
 
-    # Set up terminal for raw input (non-blocking single char reads)
+    # Set up terminal for raw input (single char reads)
     old_settings = termios.tcgetattr(sys.stdin)
 
     try:
         tty.setcbreak(sys.stdin.fileno())
 
+        # Block on a reader thread instead of polling stdin
+        keys = queue.Queue()
+        threading.Thread(target=read_keys, args=(keys,), daemon=True).start()
+
         while True:
-            key = get_key_nonblocking()
-
-            if key:
-                key_lower = key.lower()
-
-                if key_lower == 'b':
-                    print("\n[Manual Build triggered]")
-                    run_build()
-                elif key_lower == 'a':
-                    print("\n[Manual Asset Check triggered]")
-                    verify_assets()
-                elif key_lower == 'd':
-                    print("\n[Manual Decompose triggered]")
-                    run_decompose()
-                elif key_lower == 'q':
-                    print("\nQuitting...")
-                    break
-
-            time.sleep(0.1)
+            key_lower = keys.get().lower()
+
+            if key_lower == 'b':
+                print("\n[Manual Build triggered]")
+                run_build()
+            elif key_lower == 'a':
+                print("\n[Manual Asset Check triggered]")
+                verify_assets()
+            elif key_lower == 'd':
+                print("\n[Manual Decompose triggered]")
+                run_decompose()
+            elif key_lower in ('q', ''):
+                print("\nQuitting...")
+                break
 
     except KeyboardInterrupt:
         print("\nStopping watcher...")
@@ -405,6 +636,7 @@ def main():
         # Restore terminal settings
         termios.tcsetattr(sys.stdin, termios.TCSADRAIN, old_settings)
         observer.stop()
+        event_handler.cancel_pending()
 
     observer.join()
     print("Done.")